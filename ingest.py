@@ -1,13 +1,28 @@
 import os
+import re
+import sys
 import time
+import queue
+import atexit
+import shelve
+import signal
+import threading
+import email.utils
+import asyncio
 import hashlib
+import functools
+import itertools
 import logging
 import json
 import feedparser  # type: ignore
+import httpx
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from io import BytesIO
 from pathlib import Path
 from dateutil import parser as dateparser
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
 from urllib import request
 from urllib.parse import urlparse, urljoin
 from xml.etree import ElementTree as ET
@@ -17,10 +32,31 @@ from notion_client.errors import APIResponseError
 
 # Content extraction (article fetch + readable body)
 from trafilatura import extract as trafi_extract
-from trafilatura.downloads import fetch_response
 
 # HTML parsing -> Notion blocks
-from bs4 import BeautifulSoup, element, Tag
+import lxml.html
+from lxml import etree
+from lxml.html import HtmlElement
+from lxml.cssselect import CSSSelector
+
+# Optional faster JSON (orjson); falls back to the stdlib, which reads and writes the same data
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
+
+def _json_loads(data: Union[str, bytes]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(obj) + "\n").encode()
+
 
 # ---------Config-----------
 NOTION_TOKEN = os.environ["NOTION_TOKEN"]
@@ -29,7 +65,38 @@ NOTION_DATABASE_ID = os.environ["NOTION_DATABASE_ID"]
 FEEDS = [u.strip() for u in os.environ.get("FEEDS", "").split(",") if u.strip()]
 FEEDS_OPML_URL = os.environ.get("FEEDS_OPML_URL", "").strip()
 PROPERTY_MAP = os.environ.get("PROPERTY_MAP")  # optional JSON mapping
+HOST_SELECTORS = os.environ.get("HOST_SELECTORS")  # optional JSON {host: CSS selector | null}
 NOTION_VERSION = os.getenv("NOTION_VERSION")  # optional pinned Notion version
+FEED_WORKERS = int(os.environ.get("FEED_WORKERS") or "8")  # parallel feed downloads
+NOTION_RPS = float(os.environ.get("NOTION_RPS") or "3")  # sustained Notion requests/second
+NOTION_WORKERS = int(os.environ.get("NOTION_WORKERS") or "3")  # parallel page creation
+BLOCK_CACHE_MAX = int(os.environ.get("BLOCK_CACHE_MAX") or "2000")  # cached HTML -> blocks conversions
+ARTICLE_CONCURRENCY = int(os.environ.get("ARTICLE_CONCURRENCY") or "16")  # parallel article downloads
+USER_AGENT = "Mozilla/5.0 (compatible; rss-to-notion/1.0)"
+FEED_PARSER = os.environ.get("FEED_PARSER", "").strip().lower() or "feedparser"  # "feedparser" | "lxml"
+
+# Notion's default rich_text annotations (see `text_obj`)
+_DEFAULT_ANN = {
+    "bold": False,
+    "italic": False,
+    "strikethrough": False,
+    "underline": False,
+    "code": False,
+    "color": "default",
+}
+
+# Cheap "does this summary look like HTML?" test for `first_html_content`
+_HTML_HINT_RE = re.compile(r"<(?:p|div|br|h[123]|ul|ol)\b", re.IGNORECASE)
+
+# href/src values that need a base URL to resolve (see `html_to_blocks` cache keys)
+_NON_RELATIVE = r"(?:https?://|(?-i:#|javascript:|data:|about:))"
+_RELATIVE_URL_RE = re.compile(
+    rf"""\b(?:href|src)\s*=\s*(?:["']\s*(?!{_NON_RELATIVE})|(?!["'\s]|{_NON_RELATIVE}))""",
+    re.IGNORECASE,
+)
+
+# Wrapper elements whose children are flattened into top-level blocks
+CONTAINER_TAGS = ("div", "section", "article", "main")
 
 INLINE_TAGS = {
     "b": "bold",
@@ -54,10 +121,24 @@ props = {
 }
 if PROPERTY_MAP:
     try:
-        props.update(json.loads(PROPERTY_MAP))
+        props.update(_json_loads(PROPERTY_MAP))
     except json.JSONDecodeError:
         raise ValueError(f"Invalid JSON in PROPERTY_MAP: {PROPERTY_MAP}")
 
+# Known article body selectors: a direct lxml lookup is far cheaper than Trafilatura's
+# heuristics. Keys match the host or any parent domain; null means "not an article,
+# don't download it" (the entry falls back to a link).
+host_selectors: Dict[str, Optional[str]] = {
+    "substack.com": "div.body.markup",
+    "medium.com": "article",
+    "open.spotify.com": None,
+}
+if HOST_SELECTORS:
+    try:
+        host_selectors.update(_json_loads(HOST_SELECTORS))
+    except json.JSONDecodeError:
+        raise ValueError(f"Invalid JSON in HOST_SELECTORS: {HOST_SELECTORS}")
+
 # --------- Logging -----------
 log = logging.getLogger("rss2notion")
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
@@ -70,39 +151,191 @@ if NOTION_VERSION:
     notion_kwargs["version"] = NOTION_VERSION
 notion = Client(**notion_kwargs)  # type: ignore
 
-# --------- Helpers: State Management -----------
-STATE_FILE = Path("state.json")
+# --------- HTTP Clients -----------
+# Pooled clients for the whole run so repeat hosts reuse open TCP/TLS connections.
+# Feeds (FEED_PARSER=lxml) are downloaded from worker threads; httpx.Client is thread-safe.
+_FEED_HTTP = httpx.Client(
+    timeout=30,
+    follow_redirects=True,
+    headers={"User-Agent": USER_AGENT},
+    limits=httpx.Limits(max_connections=FEED_WORKERS, max_keepalive_connections=FEED_WORKERS),
+)
+
+# All async work goes through _RUNNER, which keeps a single event loop the client stays bound to.
+_RUNNER = asyncio.Runner()
+_HTTP = httpx.AsyncClient(
+    # No pool timeout: `_fetch_all` caps concurrency itself, so queued requests just wait their turn
+    timeout=httpx.Timeout(20, pool=None),
+    follow_redirects=True,
+    headers={"User-Agent": USER_AGENT},
+    limits=httpx.Limits(
+        max_connections=ARTICLE_CONCURRENCY,
+        max_keepalive_connections=ARTICLE_CONCURRENCY,
+    ),
+)
+
+# --------- Helpers: Block Cache -----------
+# HTML -> blocks conversions, keyed by content hash and kept across runs in a shelve file.
+# Least recently used entries beyond BLOCK_CACHE_MAX are evicted when the cache is closed.
+BLOCK_CACHE_FILE = ".block_cache"
+BLOCK_CACHE_VERSION = 4  # part of every key; bump whenever the HTML -> blocks conversion changes
+_USED_KEY = "__used__"  # {key: last used timestamp}, stored alongside the entries
+
+_block_cache: Optional[shelve.Shelf] = None  # type: ignore
+_block_cache_used: Dict[str, float] = {}
+_block_cache_lock = threading.Lock()
+
+def _get_block_cache() -> Any:
+    '''
+    Open the cache on first use. Call with `_block_cache_lock` held.
+    '''
 
-def _load_state() -> set[str]:
-    if STATE_FILE.exists():
+    global _block_cache
+    if _block_cache is None:
         try:
-            return set(json.loads(STATE_FILE.read_text()))
-        except json.JSONDecodeError:
-            log.error(f"Failed to load state from {STATE_FILE}; Returning empty state")
-            return set()
-    return set()
+            _block_cache = shelve.open(BLOCK_CACHE_FILE)
+            _block_cache_used.update(_block_cache.get(_USED_KEY, {}))
+            # Entries from a run that never closed the cache aren't in __used__; evict them first
+            if len(_block_cache) - (_USED_KEY in _block_cache) > len(_block_cache_used):
+                for k in _block_cache.keys():
+                    if k != _USED_KEY:
+                        _block_cache_used.setdefault(k, 0.0)
+        except Exception as e:
+            log.warning(f"Could not open block cache {BLOCK_CACHE_FILE}: {e}; caching in memory only")
+            _block_cache = {}  # type: ignore
+        atexit.register(_close_block_cache)
+    return _block_cache
 
-def _save_state(seen: set[str]) -> None:
-    STATE_FILE.write_text(json.dumps(sorted(seen)))
+def _close_block_cache() -> None:
+    '''
+    Evict least recently used entries down to BLOCK_CACHE_MAX, then flush and close.
+    '''
+
+    global _block_cache
+    with _block_cache_lock:
+        if _block_cache is None:
+            return
+        stale = sorted(_block_cache_used, key=_block_cache_used.__getitem__)
+        for k in stale[: max(len(stale) - BLOCK_CACHE_MAX, 0)]:
+            _block_cache.pop(k, None)
+            del _block_cache_used[k]
+        if isinstance(_block_cache, shelve.Shelf):
+            _block_cache[_USED_KEY] = dict(_block_cache_used)
+            _block_cache.close()
+        _block_cache = None
+
+# --------- Helpers: State Management -----------
+STATE_FILE = Path("state.json")
+# 1: bare JSON list of SHA-256 keys
+# 2: {"version": 2, "seen": [BLAKE2b keys], "legacy": [v1 keys not migrated yet],
+#     "feeds": {feed URL: [ETag, Last-Modified]}}
+STATE_VERSION = 2
+
+def _load_state() -> Dict[str, Any]:
+    state: Dict[str, Any] = {"seen": set(), "legacy": set(), "feeds": {}}
+    if not STATE_FILE.exists():
+        return state
+    try:
+        data = _json_loads(STATE_FILE.read_bytes())
+    except json.JSONDecodeError:
+        log.error(f"Failed to load state from {STATE_FILE}; Returning empty state")
+        return state
+
+    if isinstance(data, list):
+        # v1 keys are upgraded lazily as their entries show up again (see `_is_seen`)
+        state["legacy"] = set(data)
+    else:
+        state["seen"] = set(data.get("seen", []))
+        state["legacy"] = set(data.get("legacy", []))
+        state["feeds"] = data.get("feeds", {})
+    return state
+
+def _save_state(state: Dict[str, Any]) -> None:
+    '''
+    Write to a temp file and rename over state.json so a crash never leaves it half-written.
+    '''
+
+    data = {
+        "version": STATE_VERSION,
+        "seen": sorted(state["seen"]),
+        "legacy": sorted(state["legacy"]),
+        "feeds": state["feeds"],
+    }
+    tmp = STATE_FILE.with_suffix(".tmp")
+    tmp.write_bytes(_json_dumps(data))
+    os.replace(tmp, STATE_FILE)
 
 def _seen_key(feed_url: str, guid: str | None, link: str | None) -> str:
     '''
     Feed-qualified key so 2 different feeds can have the same GUID.
     '''
 
+    base = guid or link or ""
+    return hashlib.blake2b(f"{feed_url}{base}".encode(), digest_size=16).hexdigest()
+
+def _legacy_seen_key(feed_url: str, guid: str | None, link: str | None) -> str:
+    '''
+    State v1 key format, only used to recognise keys from older state files.
+    '''
+
     base = guid or link or ""
     return hashlib.sha256(f"{feed_url}{base}".encode()).hexdigest()[:32]
 
+def _is_seen(state: Dict[str, Any], key: str, feed_url: str, guid: str | None, link: str | None) -> bool:
+    '''
+    Check `key` against the seen state, upgrading a matching v1 key in place.
+    '''
+
+    if key in state["seen"]:
+        return True
+    if state["legacy"]:
+        legacy = _legacy_seen_key(feed_url, guid, link)
+        if legacy in state["legacy"]:
+            state["legacy"].discard(legacy)
+            state["seen"].add(key)
+            return True
+    return False
+
 # ---------- Helpers: Notion API with backoff -----------
 
 
+class TokenBucket:
+    """
+    Thread-safe token bucket: allows bursts of up to `burst` calls, then `rate` calls/second.
+    Only sleeps when the bucket is empty, so slow calls aren't throttled twice.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            # Reserve a token even if that goes negative; the deficit is our place in line
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+
+_bucket = TokenBucket(rate=NOTION_RPS, burst=10)
+
+
 def backoff_call(fn, max_retries=8, **kwargs):  # type: ignore
     """
     Call the Notion API with exponential backoff
+    Every attempt first takes a token from the shared rate limiter
     """
     attempt = 0
     while True:
         try:
+            _bucket.take()
             return fn(**kwargs)  # type: ignore
         except APIResponseError as e:
             if e.status == 429:
@@ -114,25 +347,46 @@ def backoff_call(fn, max_retries=8, **kwargs):  # type: ignore
             raise e
 
 
-def exists_by_guid_or_url(guid: Optional[str], url: Optional[str]) -> bool:
+def existing_keys_for_feed(
+    guids: List[str], urls: List[str], chunk_size: int = 100
+) -> Tuple[set[str], set[str]]:
     """
-    Check if a page with the given GUID or URL already exists in Notion
+    Find which of the given GUIDs / URLs already exist in Notion, batching them
+    into a few `or` queries instead of one query per entry
+    Returns (existing GUIDs, existing URLs)
     """
-    ors = []
-    if guid:
-        ors.append({"property": props["guid"], "rich_text": {"equals": guid}})  # type: ignore
-    if url:
-        ors.append({"property": props["url"], "url": {"equals": url}})  # type: ignore
-    if not ors:
-        return False
-
-    r = backoff_call(
-        notion.databases.query,
-        database_id=NOTION_DATABASE_ID,
-        filter={"or": ors},
-        page_size=1,
-    )
-    return len(r.get("results", [])) > 0  # type: ignore
+    terms = [{"property": props["guid"], "rich_text": {"equals": g}} for g in guids if g]  # type: ignore
+    terms += [{"property": props["url"], "url": {"equals": u}} for u in urls if u]  # type: ignore
+
+    found_guids: set[str] = set()
+    found_urls: set[str] = set()
+    for i in range(0, len(terms), chunk_size):
+        cursor = None
+        while True:
+            kwargs: Dict[str, Any] = {"start_cursor": cursor} if cursor else {}
+            r = backoff_call(
+                notion.databases.query,
+                database_id=NOTION_DATABASE_ID,
+                filter={"or": terms[i : i + chunk_size]},
+                page_size=100,
+                **kwargs,
+            )
+            for page in r.get("results", []):  # type: ignore
+                page_props = page.get("properties", {})  # type: ignore
+                guid = "".join(
+                    t.get("plain_text", "")  # type: ignore
+                    for t in page_props.get(props["guid"], {}).get("rich_text", [])  # type: ignore
+                )
+                if guid:
+                    found_guids.add(guid)
+                url = page_props.get(props["url"], {}).get("url")  # type: ignore
+                if url:
+                    found_urls.add(url)  # type: ignore
+            if not r.get("has_more"):  # type: ignore
+                break
+            cursor = r.get("next_cursor")  # type: ignore
+
+    return found_guids, found_urls
 
 
 def create_page(item: Dict[str, Any], first_children: List[Dict[str, Any]]) -> str:
@@ -179,12 +433,33 @@ def append_blocks(page_id: str, blocks: List[dict[str, Any]], chunk_size: int =
             block_id=page_id,
             children=blocks[i : i + chunk_size],
         )
-        time.sleep(0.1)
+
+
+def _create_and_append(item: Dict[str, Any], children: List[Dict[str, Any]]) -> str:
+    """
+    Create the page for one entry with all of its blocks. Safe to run on worker threads.
+    Returns the page ID
+    """
+
+    # Create page with initial children; append rest in batches
+    # Create with up to 90 blocks to stay well under per-request limits
+    first = children[:90]  # type: ignore
+    rest = children[90:]  # type: ignore
+    page_id = create_page(item, first)  # type: ignore
+    if rest:
+        append_blocks(page_id, rest, chunk_size=50)  # type: ignore
+
+    return page_id
 
 
 # ---------- Helpers: Feed Parsing & Content Selection -----------
 
+@functools.lru_cache(maxsize=4096)
 def _normalize_url(href: str | None, base_url: str | None = None) -> str | None:
+    """
+    Resolve / validate a link target. Pure, so cached: articles repeat the same links a lot.
+    """
+
     if not href:
         return None
     href = href.strip()
@@ -221,43 +496,101 @@ def first_html_content(entry: Dict[str, Any]) -> Optional[str]:
     # 3) Some feeds put HTML in summary without a type
     if entry.get("summary"):
         s = entry["summary"]
-        if any(
-            tag in s.lower()
-            for tag in ("<p", "<div", "<br", "<h1", "<h2", "<ul", "<ol")
-        ):
+        if _HTML_HINT_RE.search(s):
             return s
 
     return None
 
 
-def fetch_article_html(url: str) -> Optional[str]:
+async def _get(client: httpx.AsyncClient, url: str) -> Optional[Tuple[str, bytes]]:
     """
-    Fetch the article with Trafilatura's downloader, then extract the readable body as HTML.
-    Using Trafilatura avoids re-implementing readability & boilerplate removal.
+    Download a single article page; returns (final URL, raw HTML bytes) on success
+    Bytes, not text: httpx only decodes by the Content-Type header, while Trafilatura / lxml
+    also honour <meta charset>.
     """
 
-    try:
-        resp = fetch_response(url, decode=True, with_headers=True)  # type: ignore
-        if not resp or getattr(resp, "status", 0) != 200:
-            return None
+    r = await client.get(url)
+    if r.status_code != 200:
+        return None
+    return str(r.url), r.content
 
-        raw_html = resp.html
-        if not raw_html and getattr(resp, "data", None):
-            try:
-                raw_html = resp.data.decode("utf-8", errors="replace")
-            except Exception:
-                return None
 
-        cleaned = trafi_extract(
+async def _fetch_all(urls: List[str]) -> Dict[str, Tuple[str, bytes]]:
+    """
+    Download all article pages concurrently over the shared client.
+    Returns {requested URL: (final URL, raw HTML bytes)} for every successful download.
+    """
+
+    # Cap in-flight downloads at the pool size; the rest wait here instead of in the pool
+    sem = asyncio.Semaphore(ARTICLE_CONCURRENCY)
+
+    async def _bounded_get(u: str) -> Optional[Tuple[str, bytes]]:
+        async with sem:
+            return await _get(_HTTP, u)
+
+    results = await asyncio.gather(
+        *[_bounded_get(u) for u in urls], return_exceptions=True
+    )
+
+    pages: Dict[str, Tuple[str, bytes]] = {}
+    for url, res in zip(urls, results):
+        if isinstance(res, BaseException):
+            log.error(f"Failed to fetch {url}: {res}")
+        elif res:
+            pages[url] = res
+    return pages
+
+
+def _host_selector(url: str) -> Tuple[bool, Optional[str]]:
+    """
+    Look up `url`'s host (or its closest parent domain) in `host_selectors`.
+    Returns (matched, selector).
+    """
+
+    parts = (urlparse(url).hostname or "").split(".")
+    for i in range(len(parts) - 1):
+        host = ".".join(parts[i:])
+        if host in host_selectors:
+            return True, host_selectors[host]
+    return False, None
+
+
+@functools.lru_cache(maxsize=64)
+def _css(selector: str) -> CSSSelector:
+    return CSSSelector(selector)
+
+
+def fetch_article_html(url: str, pages: Dict[str, Tuple[str, bytes]]) -> Optional[str]:
+    """
+    Look up a prefetched article (see `_fetch_all`), then extract the readable body as HTML.
+    Hosts with a known selector are cut out directly with lxml; everything else goes through
+    Trafilatura, which avoids re-implementing readability & boilerplate removal.
+    """
+
+    page = pages.get(url)
+    if not page:
+        return None
+
+    final_url, raw_html = page
+    _, selector = _host_selector(final_url)
+    if selector:
+        # Any failure here (bad user selector, unparsable page) just falls through to Trafilatura
+        try:
+            nodes = _css(selector)(lxml.html.document_fromstring(raw_html))
+            if nodes:
+                return lxml.html.tostring(nodes[0], encoding="unicode", with_tail=False)
+        except Exception as e:
+            log.warning(f"Selector {selector!r} failed on {url}: {e}")
+
+    try:
+        return trafi_extract(
             raw_html,
-            url=resp.url,
+            url=final_url,
             output_format="html",
             include_links=True,
         )
-
-        return cleaned
     except Exception as e:
-        log.error(f"Failed to fetch {url}: {e}")
+        log.error(f"Failed to extract {url}: {e}")
         return None
 
 
@@ -267,19 +600,13 @@ def fetch_article_html(url: str) -> Optional[str]:
 def text_obj(content: str, **ann) -> Dict[str, Any]:  # type: ignore
     """
     Creates a Notion text object with the provided content and annotations.
+    Plain runs share the `_DEFAULT_ANN` dict, so it must never be mutated.
     """
 
     return {
         "type": "text",
         "text": {"content": content},
-        "annotations": {
-            "bold": ann.get("bold", False),  # type: ignore
-            "italic": ann.get("italic", False),  # type: ignore
-            "strikethrough": ann.get("strikethrough", False),  # type: ignore
-            "underline": ann.get("underline", False),  # type: ignore
-            "code": ann.get("code", False),  # type: ignore
-            "color": ann.get("color", "default"),  # type: ignore
-        },
+        "annotations": {**_DEFAULT_ANN, **ann} if ann else _DEFAULT_ANN,
     }
 
 
@@ -292,9 +619,19 @@ def link_text_obj(content: str, url: str, **ann) -> Dict[str, Any]:  # type: ign
     return obj
 
 
-def build_rich_text_inline(node, ann=None, href=None, base_url=None) -> List[Dict[str, Any]]:  # type: ignore
+def _inline_text(s: str, ann: Dict[str, Any], href: Optional[str]) -> Dict[str, Any]:
+    """
+    Text run for a piece of inline text, linked if it sits inside an <a>.
+    """
+
+    if href:
+        return link_text_obj(s, href, **ann)  # type: ignore
+    return text_obj(s, **ann)  # type: ignore
+
+
+def build_rich_text_inline(node: HtmlElement, ann=None, href=None, base_url=None) -> List[Dict[str, Any]]:  # type: ignore
     """
-    Recursively converts inline HTML into Notion rich_text[]
+    Recursively converts the inline content of an element (its text and children, not its tail) into Notion rich_text[]
     Supports <a>, <strong>/<em>/<b>/<i>, <code>, <br>
     """
 
@@ -302,44 +639,47 @@ def build_rich_text_inline(node, ann=None, href=None, base_url=None) -> List[Dic
         ann = {}
     out: List[Dict[str, Any]] = []
 
-    if isinstance(node, element.NavigableString):
-        s = str(node)
-        if not s:
-            return out
-        if href:
-            out.append(link_text_obj(s, href, **ann))  # type: ignore
-        else:
-            out.append(text_obj(s, **ann))  # type: ignore
+    # Comments / processing instructions carry no content of their own
+    if not isinstance(node.tag, str):
         return out
 
-    if isinstance(node, Tag):
-        tag = node.name.lower()
-
-        # Line break
-        if tag == "br":
-            out.append(text_obj("\n", **ann))  # type: ignore
-            return out
+    tag = node.tag.lower()
 
-        # Inline annotation tags
-        new_ann = dict(ann)  # type: ignore
-        if tag in INLINE_TAGS:
-            new_ann[INLINE_TAGS[tag]] = True
+    # Line break
+    if tag == "br":
+        out.append(text_obj("\n", **ann))  # type: ignore
+        return out
 
-        # Links
-        new_href = href  # type: ignore
-        if tag == "a":
-            cand = node.get("href")
-            new_href = _normalize_url(cand, base_url=base_url)  # type: ignore
+    # Inline annotation tags (only copy `ann` when this tag actually adds one)
+    ann_key = INLINE_TAGS.get(tag)
+    new_ann = {**ann, ann_key: True} if ann_key else ann  # type: ignore
 
-        for child in node.children:
-            out.extend(build_rich_text_inline(child, new_ann, new_href, base_url=base_url))  # type: ignore
+    # Links
+    new_href = _normalize_url(node.get("href"), base_url=base_url) if tag == "a" else href  # type: ignore
 
-        return out
+    if node.text:
+        out.append(_inline_text(node.text, new_ann, new_href))  # type: ignore
+    for child in node:
+        out.extend(build_rich_text_inline(child, new_ann, new_href, base_url=base_url))  # type: ignore
+        # Text following a child belongs to this element's formatting, not the child's
+        if child.tail:
+            out.append(_inline_text(child.tail, new_ann, new_href))  # type: ignore
 
     return out
 
 
-def block_from_tag(tag: Tag, base_url=None) -> Union[Dict[str, Any], List[Dict[str, Any]], None]:  # type: ignore
+_UTF8_HTML_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
+
+def _text_paragraph(s: str) -> Dict[str, Any]:
+    """
+    Paragraph block for loose text sitting directly inside a container.
+    """
+
+    return {"type": "paragraph", "paragraph": {"rich_text": [text_obj(s)]}}
+
+
+def block_from_tag(tag: HtmlElement, base_url=None) -> Union[Dict[str, Any], List[Dict[str, Any]], None]:  # type: ignore
     """
     Map a block-level HTML element to 1 or more Notion blocks
 
@@ -353,25 +693,32 @@ def block_from_tag(tag: Tag, base_url=None) -> Union[Dict[str, Any], List[Dict[s
     - container div/section/article/main
     """
 
-    name = tag.name.lower()
+    if not isinstance(tag.tag, str):
+        return None
+
+    name = tag.tag.lower()
+
+    # Non-content elements (feedparser strips these; the lxml feed path and fetched pages may not)
+    if name in ("script", "style", "noscript", "template"):
+        return None
 
     # Headings
     if name in ("h1", "h2", "h3"):
         level = {"h1": "heading_1", "h2": "heading_2", "h3": "heading_3"}[name]
-        rich = build_rich_text_inline(tag)
+        rich = build_rich_text_inline(tag, base_url=base_url)
         return {"type": level, level: {"rich_text": rich or [text_obj("")]}}  # type: ignore
 
     # Paragraphs
     if name == "p":
-        rich = build_rich_text_inline(tag)
+        rich = build_rich_text_inline(tag, base_url=base_url)
         return {"type": "paragraph", "paragraph": {"rich_text": rich or [text_obj("")]}}  # type: ignore
 
     # Lists
     if name in ("ul", "ol"):
         item_type = "bulleted_list_item" if name == "ul" else "numbered_list_item"
         items: List[Dict[str, Any]] = []
-        for li in tag.find_all("li", recursive=False):
-            rich = build_rich_text_inline(li)
+        for li in tag.findall("li"):
+            rich = build_rich_text_inline(li, base_url=base_url)
             items.append(
                 {"type": item_type, item_type: {"rich_text": rich or [text_obj("")]}}
             )  # type: ignore
@@ -379,12 +726,15 @@ def block_from_tag(tag: Tag, base_url=None) -> Union[Dict[str, Any], List[Dict[s
 
     # Blockquotes
     if name == "blockquote":
-        rich = build_rich_text_inline(tag)
+        rich = build_rich_text_inline(tag, base_url=base_url)
         return {"type": "quote", "quote": {"rich_text": rich or [text_obj("")]}}  # type: ignore
 
     # Code blocks (preformatted)
     if name == "pre":
-        code_text = tag.get_text("\n")
+        # text_content() skips <br>, so turn them into newlines first
+        for br in tag.iter("br"):
+            br.tail = "\n" + (br.tail or "")
+        code_text = tag.text_content()
         return {
             "type": "code",
             "code": {"rich_text": [text_obj(code_text)], "language": "plain text"},
@@ -402,70 +752,123 @@ def block_from_tag(tag: Tag, base_url=None) -> Union[Dict[str, Any], List[Dict[s
             return None # drop invalid image URLs
 
     # Generic Containers: Flatten Children
-    if name in ("div", "section", "article", "main"):
-        blocks: List[Dict[str, Any]] = []
-        for child in tag.children:
-            if isinstance(child, element.NavigableString):
-                if str(child).strip():
-                    blocks.append(
-                        {
-                            "type": "paragraph",
-                            "paragraph": {"rich_text": [text_obj(str(child))]},
-                        }
-                    )  # type: ignore
-            elif isinstance(child, Tag):
-                block = block_from_tag(child, base_url=base_url)
-                if isinstance(block, list):
-                    blocks.extend(block)
-                elif block:
-                    blocks.append(block)
-        return blocks
+    if name in CONTAINER_TAGS:
+        return list(_children_blocks(tag, base_url=base_url))
 
     # Fallback: paragraph with the element's text
-    rich = build_rich_text_inline(tag)
+    # (`rich` already holds every text node, so when it's empty there is no text to re-walk for)
+    rich = build_rich_text_inline(tag, base_url=base_url)
     return {
         "type": "paragraph",
-        "paragraph": {"rich_text": rich or [text_obj(tag.get_text())]},
+        "paragraph": {"rich_text": rich or [text_obj("")]},
     }  # type: ignore
 
 
+def _blocks_from(tag: HtmlElement, base_url=None) -> Iterator[Dict[str, Any]]:  # type: ignore
+    """
+    Lazily yield the Notion blocks for one element.
+    Containers stream their children, so a caller with enough blocks can stop without converting the rest.
+    """
+
+    if isinstance(tag.tag, str) and tag.tag.lower() in CONTAINER_TAGS:
+        yield from _children_blocks(tag, base_url=base_url)
+        return
+
+    block = block_from_tag(tag, base_url=base_url)
+    if isinstance(block, list):
+        yield from block
+    elif block:
+        yield block
+
+
+def _children_blocks(parent: HtmlElement, base_url=None) -> Iterator[Dict[str, Any]]:  # type: ignore
+    """
+    Lazily yield blocks for everything inside `parent`: loose text becomes paragraphs,
+    child elements go through `_blocks_from`.
+    """
+
+    if parent.text and parent.text.strip():
+        yield _text_paragraph(parent.text)
+    for child in parent:
+        yield from _blocks_from(child, base_url=base_url)
+        if child.tail and child.tail.strip():
+            yield _text_paragraph(child.tail)
+
+
 def html_to_blocks(html: str, base_url: str | None = None,max_blocks: int = 180) -> List[Dict[str, Any]]:
     """
     Convert HTML to a list of Notion blocks.
+    Results are memoized by content hash (see `_get_block_cache`), so boilerplate
+    descriptions repeated across entries are only parsed once.
     """
 
-    soup = BeautifulSoup(html, "lxml")
-    container = soup.body or soup
-    blocks: List[Dict[str, Any]] = []
+    # base_url only changes the result when there are relative links to resolve; leaving it
+    # out otherwise lets boilerplate shared across entries (each with its own URL) hit the cache
+    base_key = (base_url or "") if _RELATIVE_URL_RE.search(html) else ""
+    k = hashlib.blake2b(
+        f"{BLOCK_CACHE_VERSION}|{base_key}|{max_blocks}|{html}".encode(), digest_size=16
+    ).hexdigest()
+    with _block_cache_lock:
+        cache = _get_block_cache()
+        if k in cache:
+            _block_cache_used[k] = time.time()
+            return cache[k]
 
-    for el in container.children:
-        if isinstance(el, element.NavigableString):
-            if str(el).strip():
-                blocks.append(
-                    {
-                        "type": "paragraph",
-                        "paragraph": {"rich_text": [text_obj(str(el))]},
-                    }
-                )  # type: ignore
-            continue
-        if not isinstance(el, Tag):
-            continue
+    blocks = _convert_html(html, base_url=base_url, max_blocks=max_blocks)
 
-        block = block_from_tag(el, base_url=base_url)
-        if isinstance(block, list):
-            blocks.extend(block)
-        elif block:
-            blocks.append(block)
+    with _block_cache_lock:
+        _get_block_cache()[k] = blocks
+        _block_cache_used[k] = time.time()
+    return blocks
 
-        if len(blocks) >= max_blocks:
-            break
 
-    return [blk for blk in blocks if blk]
+def _convert_html(html: str, base_url: str | None = None, max_blocks: int = 180) -> List[Dict[str, Any]]:
+    """
+    Uncached body of `html_to_blocks`.
+    """
+
+    try:
+        root = lxml.html.document_fromstring(html)
+    except ValueError:
+        # str input with an <?xml ... encoding="..."?> declaration: it's already decoded,
+        # so parse it as UTF-8 bytes and ignore the declared encoding
+        try:
+            root = lxml.html.document_fromstring(html.encode("utf-8"), parser=_UTF8_HTML_PARSER)
+        except etree.ParserError:
+            return []
+    except etree.ParserError:  # empty / whitespace-only document
+        return []
+    container = root.find("body")
+    if container is None:
+        container = root
+
+    # Stop converting as soon as we have max_blocks, however deeply they're nested
+    return list(itertools.islice(_children_blocks(container, base_url=base_url), max_blocks))
 
 
 # --------- Helpers: Entry Normalization -----------
 
 
+def _parse_date(s: str) -> Optional[str]:
+    """
+    Parse a feed date to ISO 8601.
+    Tries the stdlib fast paths for RFC 822 (RSS) and RFC 3339 (Atom) before dateutil's slow guesser.
+    """
+
+    try:
+        return email.utils.parsedate_to_datetime(s).isoformat()
+    except Exception:
+        pass
+    try:
+        return datetime.fromisoformat(s.replace("Z", "+00:00")).isoformat()
+    except Exception:
+        pass
+    try:
+        return dateparser.parse(s).isoformat()
+    except Exception:
+        return None
+
+
 def parse_entry(e: Dict[str, Any], feed_title: str, feed_url: str) -> Dict[str, Any]:
     """
     Normalize an entry from an RSS feed into a common format.
@@ -480,15 +883,10 @@ def parse_entry(e: Dict[str, Any], feed_title: str, feed_url: str) -> Dict[str,
         for t in e.get("tags", [])
         if isinstance(t, dict) and t.get("term") # type: ignore
     ]  # type: ignore
-    published = None
-    if "published" in e:
-        try:
-            published = dateparser.parse(e["published"]).isoformat()
-        except Exception:
-            pass
-    h = hashlib.sha256("|".join([guid or "", link or "", title]).encode()).hexdigest()[
-        :24
-    ]
+    published = _parse_date(e["published"]) if "published" in e else None
+    h = hashlib.blake2b(
+        "|".join([guid or "", link or "", title]).encode(), digest_size=12
+    ).hexdigest()
     return {
         "title": title,
         "url": link,
@@ -501,23 +899,313 @@ def parse_entry(e: Dict[str, Any], feed_title: str, feed_url: str) -> Dict[str,
     }
 
 
+# --------- Helpers: lxml Feed Parser (FEED_PARSER=lxml) -----------
+# Streams RSS 2.0 / RSS 1.0 / Atom with lxml and only extracts the fields `parse_entry`
+# and `first_html_content` use, shaped like feedparser's output so both paths share them.
+
+ATOM_NS = "http://www.w3.org/2005/Atom"
+RSS1_NS = "http://purl.org/rss/1.0/"
+CONTENT_NS = "http://purl.org/rss/1.0/modules/content/"
+DC_NS = "http://purl.org/dc/elements/1.1/"
+_CORE_NS = (None, ATOM_NS, RSS1_NS)
+
+
+def _inner_xml(el: Any) -> str:
+    """
+    Serialized children of an element, e.g. the <div> wrapper inside Atom type="xhtml" content.
+    """
+
+    return (el.text or "") + "".join(
+        etree.tostring(child, encoding="unicode") for child in el
+    )
+
+
+def _entry_from(el: Any, base_url: str) -> Dict[str, Any]:
+    """
+    Build a feedparser-style entry dict from an RSS <item> or Atom <entry>.
+    Relative links / permalink GUIDs resolve against `base_url` like feedparser does,
+    so seen keys and GUIDs don't change when switching parsers.
+    """
+
+    e: Dict[str, Any] = {}
+    tags: List[Dict[str, str]] = []
+    permalink: Optional[str] = None
+
+    for child in el:
+        if not isinstance(child.tag, str):
+            continue
+        q = etree.QName(child)
+        name, ns = q.localname, q.namespace
+        text = (child.text or "").strip()
+
+        if ns in _CORE_NS:
+            if name == "title":
+                e.setdefault("title", text)
+            elif name == "link":
+                # Atom: <link rel="alternate" href="..."/>, RSS: <link>...</link>
+                if child.get("href"):
+                    if child.get("rel", "alternate") == "alternate":
+                        e.setdefault("link", urljoin(base_url, child.get("href")))
+                elif text:
+                    e.setdefault("link", urljoin(base_url, text))
+            elif name == "guid" and text and child.get("isPermaLink", "true") != "false":
+                e.setdefault("id", urljoin(base_url, text))
+                permalink = e["id"]
+            elif name in ("guid", "id") and text:
+                e.setdefault("id", text)
+            elif name == "author":
+                author_name = child.findtext(f"{{{ATOM_NS}}}name")
+                e.setdefault("author", (author_name or text).strip())
+            elif name == "category":
+                term = child.get("term") or text
+                if term:
+                    tags.append({"term": term})
+            elif name in ("pubDate", "published"):
+                e.setdefault("published", text)
+            elif name in ("description", "summary"):
+                # RSS descriptions are HTML by convention; Atom says so via type=""
+                ctype = child.get("type", "html" if ns != ATOM_NS else "text")
+                e.setdefault("summary", _inner_xml(child) if ctype == "xhtml" else (child.text or ""))
+                e.setdefault("summary_detail", {"type": "text/html" if ctype in ("html", "xhtml") else "text/plain"})
+            elif name == "content" and ns == ATOM_NS:
+                ctype = child.get("type", "text")
+                e.setdefault("content", []).append({
+                    "type": "text/html" if ctype in ("html", "xhtml") else "text/plain",
+                    "value": _inner_xml(child) if ctype == "xhtml" else (child.text or ""),
+                })
+        elif ns == CONTENT_NS and name == "encoded":
+            e.setdefault("content", []).append({"type": "text/html", "value": child.text or ""})
+        elif ns == DC_NS:
+            if name == "creator":
+                e.setdefault("author", text)
+            elif name == "subject" and text:
+                tags.append({"term": text})
+
+    # Like feedparser, a permalink GUID doubles as the link when there's no <link>
+    if permalink:
+        e.setdefault("link", permalink)
+    if tags:
+        e["tags"] = tags
+    return e
+
+
+def stream_feed(data: bytes, meta: Dict[str, Any], base_url: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield entries from raw feed XML one at a time, freeing each element once it's read.
+    The feed's own title is stored in `meta["title"]` as soon as it is seen.
+    """
+
+    events = etree.iterparse(
+        BytesIO(data),
+        events=("end",),
+        tag=("{*}item", "{*}entry", "{*}title"),
+        recover=True,
+        resolve_entities=False,
+    )
+    for _, el in events:
+        name = etree.QName(el).localname
+        if name == "title":
+            parent = el.getparent()
+            if parent is not None and etree.QName(parent).localname in ("channel", "feed"):
+                meta.setdefault("title", (el.text or "").strip())
+            continue
+
+        yield _entry_from(el, base_url)
+
+        # Drop the entry (and any already-read siblings) so memory stays flat
+        el.clear(keep_tail=True)
+        while el.getprevious() is not None:
+            del el.getparent()[0]
+
+
+def fetch_feed_lxml(url: str, etag: Optional[str] = None, modified: Optional[str] = None) -> Any:
+    """
+    Download a feed over the pooled client (with conditional GET headers) and parse it with lxml.
+    Returns a feedparser-compatible result (`status`, `etag`, `modified`, `feed.title`, `entries`).
+    """
+
+    headers: Dict[str, str] = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if modified:
+        headers["If-Modified-Since"] = modified
+
+    r = _FEED_HTTP.get(url, headers=headers)
+    result = feedparser.FeedParserDict(  # type: ignore
+        status=r.status_code,
+        etag=r.headers.get("etag"),
+        modified=r.headers.get("last-modified"),
+        feed=feedparser.FeedParserDict(),  # type: ignore
+        entries=[],
+    )
+    if r.status_code == 304:
+        return result
+    r.raise_for_status()
+
+    result.entries = list(stream_feed(r.content, result.feed, str(r.url)))
+    return result
+
+
+def _fetch_and_parse_feed(url: str, etag: Optional[str] = None, modified: Optional[str] = None) -> Any:
+    """
+    Download and parse a single feed. Runs on a worker thread.
+    Passing the ETag / Last-Modified from the previous run lets the server answer 304 Not Modified.
+    """
+
+    if FEED_PARSER == "lxml":
+        return fetch_feed_lxml(url, etag=etag, modified=modified)
+    return feedparser.parse(url, etag=etag, modified=modified)  # type: ignore
+
+
 def load_feeds_from_opml(url: str) -> List[str]:
     """
     Load a list of feed URLs from an OPML file.
     """
 
-    data = request.urlopen(url).read()
     feeds: List[str] = []
-    for outline in ET.fromstring(data).iter("outline"):
-        u = outline.attrib.get("xmlUrl")
-        if u:
-            feeds.append(u)
+    # Stream straight from the socket and drop each <outline> once read,
+    # so huge OPML exports never sit in memory as a full tree
+    with request.urlopen(url) as r:
+        for _, el in ET.iterparse(r, events=("end",)):
+            if el.tag.endswith("outline"):
+                u = el.attrib.get("xmlUrl")
+                if u:
+                    feeds.append(u)
+                el.clear()
     return feeds
 
 
 # --------- Main -----------
 
 
+def _build_children(item: Dict[str, Any], html: Optional[str], pages: Dict[str, Tuple[str, bytes]]) -> List[Dict[str, Any]]:
+    """
+    Turn one entry's content into Notion blocks.
+    """
+
+    # Extract from the downloaded article
+    if not html and item["url"]:
+        html = fetch_article_html(item["url"], pages)
+
+    # Convert to Notion blocks (fallback paragraph if still no content)
+    children = html_to_blocks(html, base_url=item["url"]) if html else []
+    if not children:
+        fallback = "Open on the web: " + (item["url"] or "No URL")
+        children = [ # type: ignore
+            {
+                "type": "paragraph",
+                "paragraph": {"rich_text": [text_obj(fallback)]},
+            }
+        ]  # type: ignore
+    return children
+
+
+def _produce_blocks(
+    new_entries: List[Tuple[str, Dict[str, Any], Optional[str]]],
+    pages: Dict[str, Tuple[str, bytes]],
+    out: "queue.Queue[Any]",
+) -> None:
+    """
+    Pipeline stage run on its own thread: puts (key, item, blocks) on `out` for each entry
+    (blocks is None if conversion failed), then a final None.
+    """
+
+    try:
+        for k, item, html in new_entries:
+            try:
+                children = _build_children(item, html, pages)
+            except Exception as e:
+                log.error(f"Failed to convert {item['url'] or item['title']}: {e}")
+                children = None
+            out.put((k, item, children))
+    finally:
+        out.put(None)
+
+
+def process_feed(url: str, parsed: Any, state: Dict[str, Any]) -> int:
+    """
+    Ingest the new entries of one parsed feed into Notion.
+    Adds the key of every created (or already present) page to the seen state;
+    returns the number of pages created.
+    """
+
+    src = parsed.feed.get("title", url)  # type: ignore
+    new_count = 0
+
+    # Skip if this item is in seen state (free, so checked before asking Notion)
+    candidates: List[Tuple[str, Any, Dict[str, Any]]] = []
+    batch_keys: set[str] = set()  # feeds sometimes list the same entry twice
+    for e in parsed.entries:  # type: ignore
+        item = parse_entry(e, src, url)  # type: ignore
+        k = _seen_key(url, item["guid"], item["url"])  # type: ignore
+        if k in batch_keys or _is_seen(state, k, url, item["guid"], item["url"]):  # type: ignore
+            continue
+        batch_keys.add(k)
+        candidates.append((k, e, item))
+
+    # One batched lookup for the remaining entries that are already in Notion
+    existing_guids, existing_urls = existing_keys_for_feed(
+        [it["guid"] for _, _, it in candidates],
+        [it["url"] for _, _, it in candidates],
+    )
+
+    # Pick out the entries we haven't ingested yet
+    new_entries: List[Tuple[str, Dict[str, Any], Optional[str]]] = []
+    for k, e, item in candidates:
+        # Skip if we already have this item in Notion database; remember it so we don't ask again
+        if item["guid"] in existing_guids or item["url"] in existing_urls:
+            state["seen"].add(k)
+            continue
+
+        # Prefer full content from the feed
+        new_entries.append((k, item, first_html_content(e)))  # type: ignore
+
+    # Fallback: download every article the feed didn't ship content for, all at once
+    needs_fetch = list(
+        dict.fromkeys(
+            it["url"]
+            for _, it, html in new_entries
+            if not html and it["url"] and _host_selector(it["url"]) != (True, None)
+        )
+    )
+    pages = _RUNNER.run(_fetch_all(needs_fetch)) if needs_fetch else {}
+
+    # Convert entries to blocks on a background thread while pages are being created
+    blocks_q: "queue.Queue[Any]" = queue.Queue(maxsize=4)
+    threading.Thread(
+        target=_produce_blocks, args=(new_entries, pages, blocks_q), daemon=True
+    ).start()
+
+    # Create a few pages at a time; backoff_call absorbs any 429s per thread
+    failed = 0
+    with ThreadPoolExecutor(max_workers=NOTION_WORKERS) as ex:
+        futures = {}
+        while (job := blocks_q.get()) is not None:
+            k, item, children = job
+            if children is None:
+                failed += 1
+                continue
+            futures[ex.submit(_create_and_append, item, children)] = (k, item)
+
+        for fut in as_completed(futures):
+            k, item = futures[fut]
+            try:
+                fut.result()
+            except Exception as e:
+                failed += 1
+                log.error(f"Failed to create page for {item['url'] or item['title']}: {e}")
+                continue
+
+            # Add to seen state
+            state["seen"].add(k)
+            new_count += 1
+
+    if failed:
+        raise RuntimeError(f"{failed} of {len(new_entries)} pages could not be created")
+
+    return new_count
+
+
 def main():
     feeds = list(FEEDS)
     if not feeds and FEEDS_OPML_URL:
@@ -529,68 +1217,53 @@ def main():
         log.warning("No feeds configured (set FEEDS or FEEDS_OPML_URL).")
         return
 
-    seen = _load_state()
-    state_dirty = False
-
-    for url in feeds:
-        try:
-            parsed = feedparser.parse(url)  # type: ignore
-            src = parsed.feed.get("title", url)  # type: ignore
-            new_count = 0
-
-            for e in parsed.entries:  # type: ignore
-                item = parse_entry(e, src, url)  # type: ignore
-
-                # Skip if we already have this item in Notion database
-                if exists_by_guid_or_url(item["guid"], item["url"]):
-                    continue
-
-                # Skip if this item is in seen state
-                k = _seen_key(url, item["guid"], item["url"])  # type: ignore
-                if k in seen:
-                    continue
-
-                # Prefer full content from the feed
-                html = first_html_content(e)  # type: ignore
-
-                # Fallback: fetch & extrack from article URL
-                if not html and item["url"]:
-                    html = fetch_article_html(item["url"])
-
-                # Convert to Notion blocks (fallback paragraph if still no content)
-                children = html_to_blocks(html, base_url=item["url"]) if html else []
-                if not children:
-                    fallback = "Open on the web: " + (item["url"] or "No URL")
-                    children = [ # type: ignore
-                        {
-                            "type": "paragraph",
-                            "paragraph": {"rich_text": [text_obj(fallback)]},
-                        }
-                    ]  # type: ignore
-
-                # Create page with initial children; append rest in batches
-                # Create with up to 90 blocks to stay well under per-request limits
-
-                first = children[:90]  # type: ignore
-                rest = children[90:]  # type: ignore
-                page_id = create_page(item, first)  # type: ignore
-                if rest:
-                    append_blocks(page_id, rest, chunk_size=50)  # type: ignore
-
-                # Add to seen state
-                seen.add(k)
-                state_dirty = True
-
-                new_count += 1
-                time.sleep(0.35)  # keep a rate-limit friendly pace
-
-            log.info(f"Processed {url} -> {new_count} new items")
+    state = _load_state()
+    seen_count = len(state["seen"])
+    validators = state["feeds"]  # feed URL -> [ETag, Last-Modified]
+    validators_before = dict(validators)
 
-        except Exception as e:
-            log.exception(f"Error processing {url}: {e}")
+    # Turn a CI cancellation (SIGTERM) into a normal exit so state still gets saved
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
 
-        if state_dirty:
-            _save_state(seen)
+    try:
+        with ThreadPoolExecutor(max_workers=FEED_WORKERS) as ex:
+            futures = {
+                ex.submit(_fetch_and_parse_feed, u, *validators.get(u, (None, None))): u
+                for u in feeds
+            }
+
+            # Feeds download in parallel; each one is then ingested here,
+            # one feed at a time, as its download completes
+            for fut in as_completed(futures):
+                url = futures[fut]
+                try:
+                    parsed = fut.result()
+                    if parsed.get("status") == 304:
+                        log.info(f"Processed {url} -> not modified")
+                        continue
+
+                    new_count = process_feed(url, parsed, state)
+                    log.info(f"Processed {url} -> {new_count} new items")
+
+                    # Only remember validators once the feed went through cleanly,
+                    # otherwise a 304 next run would hide entries we failed on
+                    if parsed.get("etag") or parsed.get("modified"):
+                        validators[url] = [parsed.get("etag"), parsed.get("modified")]
+                    else:
+                        validators.pop(url, None)
+                except Exception as e:
+                    log.exception(f"Error processing {url}: {e}")
+    finally:
+        # Write state once, at the end of the run (seen only ever grows), and before
+        # any cleanup that could raise or be interrupted
+        try:
+            if len(state["seen"]) != seen_count or validators != validators_before:
+                _save_state(state)
+        finally:
+            _RUNNER.run(_HTTP.aclose())
+            _RUNNER.close()
+            _FEED_HTTP.close()
+            _close_block_cache()
 
 
 if __name__ == "__main__":